@@ -0,0 +1,172 @@
+from __future__ import annotations
+import glob
+import json
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, IO, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .state import SESSIONS
+from .commands import COMMANDS, run_command
+
+Command = Tuple[Optional[str], str, Dict[str, Any]]  # (input, cmd, arg)
+
+
+def parse_script(path: str) -> List[Command]:
+    """
+    Read a batch script. Each non-empty line (``#`` = comment) is either
+    CLI syntax, ``profile {"columns": ["precio"]}``, or a JSON object
+    ``{"cmd": "profile", "args": {...}, "input": "ventas.csv"}`` where
+    ``input`` is optional and pins the command to a single file.
+    """
+    cmds: List[Command] = []
+    with open(path, encoding="utf-8") as f:
+        for n, raw in enumerate(f, 1):
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                if line.startswith("{"):
+                    obj = json.loads(line)
+                    inp, cmd, arg = obj.get("input"), obj["cmd"], obj.get("args") or {}
+                else:
+                    cmd, *rest = line.split(" ", 1)
+                    inp, arg = None, json.loads(rest[0]) if rest else {}
+            except (ValueError, KeyError) as e:
+                raise ValueError(f"{path}:{n}: invalid command line: {e}") from e
+            if cmd not in COMMANDS:
+                raise ValueError(f"{path}:{n}: unknown command: {cmd}")
+            cmds.append((inp, cmd, arg))
+    return cmds
+
+
+def expand_inputs(patterns: List[str]) -> List[str]:
+    paths: List[str] = []
+    for p in patterns:
+        if not glob.has_magic(p):
+            paths.append(p)
+            continue
+        matches = sorted(glob.glob(p))
+        if not matches:
+            raise ValueError(f"Input pattern matched no files: {p}")
+        paths.extend(matches)
+    return paths
+
+
+def plan_jobs(commands: List[Command], inputs: List[str]) -> Dict[Optional[str], List[Tuple[str, Dict[str, Any]]]]:
+    """
+    Group commands per input file, keeping script order. Commands without an
+    explicit input run against every input; each group loads its file once.
+    Inputs are grouped by real path (``data/a.csv`` == ``./data/a.csv``) and
+    keyed by the first spelling seen, preferring the one from ``inputs``.
+    """
+    spelling: Dict[str, str] = {}
+    for p in inputs:
+        spelling.setdefault(os.path.realpath(p), p)
+    unique_inputs = list(spelling.values())
+
+    jobs: Dict[Optional[str], List[Tuple[str, Dict[str, Any]]]] = {}
+    for inp, cmd, arg in commands:
+        if inp is not None:
+            targets = [spelling.setdefault(os.path.realpath(inp), inp)]
+        else:
+            targets = unique_inputs or [None]
+        for t in targets:
+            jobs.setdefault(t, []).append((cmd, arg))
+    return jobs
+
+
+def _jsonable(v: Any) -> Any:
+    """NaN/inf/NaT/NA -> None and numpy scalars -> Python, so lines are strict JSON."""
+    if isinstance(v, dict):
+        return {k if isinstance(k, str) else str(k): _jsonable(x) for k, x in v.items()}
+    if isinstance(v, (list, tuple)):
+        return [_jsonable(x) for x in v]
+    if isinstance(v, np.generic):
+        v = v.item()
+    if isinstance(v, float):
+        return v if math.isfinite(v) else None
+    if v is pd.NaT or v is pd.NA:
+        return None
+    return v
+
+
+def _line(obj: Dict[str, Any]) -> str:
+    return json.dumps(_jsonable(obj), ensure_ascii=False, separators=(",", ":"), allow_nan=False, default=str)
+
+
+def run_input(path: Optional[str], commands: List[Tuple[str, Dict[str, Any]]]) -> Tuple[List[str], int]:
+    """
+    Run all commands of one input in a private session; returns (compact JSON
+    lines, failures). A failed load_data stops the input: the remaining
+    commands are reported in a single "skipped" line and not counted again.
+    """
+    if path is not None and (not commands or commands[0][0] != "load_data"):
+        commands = [("load_data", {})] + list(commands)
+
+    sid = f"batch:{os.getpid()}:{path}"
+    state = SESSIONS.get(sid)
+    lines, failed = [], 0
+    try:
+        for n, (cmd, arg) in enumerate(commands):
+            if cmd == "load_data" and path is not None and "source" not in arg:
+                arg = {**arg, "source": {"type": "local", "path": path}}
+            t0 = time.perf_counter()
+            try:
+                res = run_command(cmd, arg, state)
+            except Exception as e:
+                res = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+                failed += 1
+            ms = round((time.perf_counter() - t0) * 1000.0, 3)
+            lines.append(_line({"input": path, "cmd": cmd, **res, "ms": ms}))
+            if cmd == "load_data" and not res["ok"]:
+                rest = [c for c, _ in commands[n + 1:]]
+                if rest:
+                    lines.append(_line({"input": path, "cmd": "skipped", "ok": False, "skipped": rest,
+                                        "error": "load_data failed", "ms": 0.0}))
+                break
+    finally:
+        SESSIONS.drop(sid)
+    return lines, failed
+
+
+def run_batch(script: str, inputs: List[str], workers: Optional[int] = None, out: Optional[IO[str]] = None) -> int:
+    """
+    Run `script` over `inputs` and write one JSON line per command to `out`.
+    Inputs are independent and run in parallel worker processes; results are
+    streamed as each input finishes. Returns the number of failed commands.
+    """
+    out = out or sys.stdout
+    jobs = plan_jobs(parse_script(script), expand_inputs(inputs))
+    workers = workers or os.cpu_count() or 1
+    failed = 0
+
+    def emit(result: Tuple[List[str], int]) -> None:
+        nonlocal failed
+        lines, n_failed = result
+        for line in lines:
+            out.write(line + "\n")
+        out.flush()
+        failed += n_failed
+
+    if workers <= 1 or len(jobs) <= 1:
+        for path, cmds in jobs.items():
+            emit(run_input(path, cmds))
+        return failed
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+        futures = {pool.submit(run_input, path, cmds): path for path, cmds in jobs.items()}
+        for fut in as_completed(futures):
+            try:
+                result = fut.result()
+            except Exception as e:
+                # Un worker caído (BrokenProcessPool, pickling...) solo pierde su input
+                result = ([_line({"input": futures[fut], "cmd": None, "ok": False,
+                                  "error": f"{type(e).__name__}: {e}", "ms": None})], 1)
+            emit(result)
+    return failed
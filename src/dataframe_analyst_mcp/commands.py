@@ -0,0 +1,87 @@
+from __future__ import annotations
+from typing import Any, Callable, Dict, Optional
+
+from .state import STATE, SESSIONS, SessionState
+from .tools.loader import load_data, source_version
+from .tools.schema import infer_schema
+from .tools.missing import missing_report, missing_patterns
+from .tools.profile import profile as profile_tool
+from .tools.corr import correlation
+from .tools.outliers import detect_outliers
+from .tools.groupby import groupby as groupby_tool
+from .tools.export_report import export_report as export_report_tool
+
+# Comandos de la CLI (interactiva y batch): nombre -> fn(state, arg) -> dict
+
+def _load_data(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    src, opts = arg.get("source"), arg.get("options")
+    key = source_version(src, opts)
+    df, meta = SESSIONS.load(state, key, lambda: load_data(src, opts), est_bytes=key.size if key else None)
+    prev = df.head(5).to_dict(orient="records")
+    return {"ok": True, "columns": list(map(str, df.columns)), "rows": int(df.shape[0]),
+            "rows_preview": prev, "source_meta": meta}
+
+def _infer_schema(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    return {"ok": True, "schema": infer_schema(df, nulls=state.nulls)}
+
+def _missing_report(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    return {"ok": True, "missing_pct": missing_report(df, nulls=state.nulls)}
+
+def _missing_patterns(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    return {"ok": True, **missing_patterns(
+        df,
+        nulls=state.nulls,
+        top=arg.get("top", 10),
+        pairs=arg.get("pairs", 20),
+        min_abs=arg.get("min_abs", 0.0),
+        full_matrix=arg.get("full_matrix", False)
+    )}
+
+def _profile(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    return {"ok": True, **profile_tool(df, columns=arg.get("columns"), percentiles=arg.get("percentiles"))}
+
+def _correlation(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    method = arg.get("method", "pearson")
+    return {"ok": True, "method": method, "matrix": correlation(df, method=method)}
+
+def _detect_outliers(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    return {"ok": True, **detect_outliers(
+        df,
+        column=arg["column"],
+        method=arg.get("method", "iqr"),
+        factor=arg.get("factor", 1.5),
+        z=arg.get("z", 3.0)
+    )}
+
+def _groupby(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    return {"ok": True, "result": groupby_tool(df, by=arg["by"], metrics=arg["metrics"])}
+
+def _export_report(state: SessionState, arg: Dict[str, Any]) -> Dict[str, Any]:
+    df = state.require_df()
+    return {"ok": True, **export_report_tool(arg["dest"], fmt=arg["fmt"], sections=arg["sections"],
+                                             df=df, nulls=state.nulls)}
+
+COMMANDS: Dict[str, Callable[[SessionState, Dict[str, Any]], Dict[str, Any]]] = {
+    "load_data": _load_data,
+    "infer_schema": _infer_schema,
+    "missing_report": _missing_report,
+    "missing_patterns": _missing_patterns,
+    "profile": _profile,
+    "correlation": _correlation,
+    "detect_outliers": _detect_outliers,
+    "groupby": _groupby,
+    "export_report": _export_report,
+}
+
+def run_command(cmd: str, arg: Optional[Dict[str, Any]] = None, state: Optional[SessionState] = None) -> Dict[str, Any]:
+    fn = COMMANDS.get(cmd)
+    if fn is None:
+        raise ValueError(f"Unknown command: {cmd}")
+    return fn(state or STATE, arg or {})
@@ -2,21 +2,17 @@ from __future__ import annotations
 
 import argparse
 import json
-from typing import Any, Dict, List, Optional, Union, Literal
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Union, Literal
 
+import anyio
 from pydantic import BaseModel
 
-from .state import STATE
-from .tools.loader import load_data
-from .tools.schema import infer_schema
-from .tools.missing import missing_report
-from .tools.profile import profile as profile_tool
-from .tools.corr import correlation
-from .tools.outliers import detect_outliers
-from .tools.groupby import groupby as groupby_tool
-from .tools.export_report import export_report as export_report_tool
+from .state import STATE, SESSIONS, SessionState
+from .commands import COMMANDS, run_command
+from .batch import run_batch
 
-from mcp.server.fastmcp import FastMCP
+from mcp.server.fastmcp import FastMCP, Context
 
 # ---------------------------------------------------------------------
 # Modelos Pydantic para entradas (FastMCP generará el input_schema)
@@ -58,80 +54,125 @@ Dest = Union[DestLocal, DestGDriveFolder]
 # ---------------------------------------------------------------------
 # FastMCP app
 # ---------------------------------------------------------------------
-app = FastMCP("dataframe-analyst-mcp")
+@asynccontextmanager
+async def _transport_session(_: FastMCP) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Runs once per transport session (per `mcp-session-id` over streamable HTTP,
+    once per process over stdio); drops the session's dataset when it ends.
+    """
+    bound: Dict[str, Any] = {"session_id": None}
+    try:
+        yield bound
+    finally:
+        if bound["session_id"] is not None:
+            SESSIONS.drop(bound["session_id"])
+
+app = FastMCP("dataframe-analyst-mcp", lifespan=_transport_session)
+
+def _session(ctx: Context) -> SessionState:
+    """
+    Session of the calling client. Over streamable HTTP each `mcp-session-id`
+    gets its own dataset/cache; stdio uses the default one. Only the transport
+    session id is trusted (never client-supplied `_meta`).
+    """
+    try:
+        rc = ctx.request_context
+    except ValueError:
+        # fuera de una petición MCP (p.ej. llamada directa en tests)
+        return SESSIONS.default
+    headers = getattr(rc.request, "headers", None)
+    sid = headers.get("mcp-session-id") if headers is not None else None
+    state = SESSIONS.get(sid)
+    if sid is not None and isinstance(rc.lifespan_context, dict):
+        rc.lifespan_context["session_id"] = sid
+    return state
+
+# Las herramientas MCP delegan en los mismos comandos que la CLI/batch (commands.py)
+
+async def _run(ctx: Context, cmd: str, arg: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a command for the caller's session in a worker thread, so long
+    loads/analyses don't block the event loop for other HTTP clients."""
+    state = _session(ctx)
+    return await anyio.to_thread.run_sync(run_command, cmd, arg, state)
 
 @app.tool("load_data")
-async def _load_data(source: LoadSource, options: Optional[LoadOptions] = None) -> Dict[str, Any]:
+async def _load_data(ctx: Context, source: LoadSource, options: Optional[LoadOptions] = None) -> Dict[str, Any]:
     """
     Load data into the session. Supports:
       - local: path
       - gdrive_file: fileId
       - gsheet: spreadsheetId (+range/sheet opcionales)
     """
-    df, meta = load_data(source.model_dump(), options.model_dump() if options else None)
-    STATE.set_df(df, meta)
-    preview = df.head(5).to_dict(orient="records")
-    return {
-        "ok": True,
-        "columns": list(map(str, df.columns)),
-        "rows": int(getattr(df, "shape", (0, 0))[0]),
-        "rows_preview": preview,
-        "source_meta": meta,
-    }
+    arg = {"source": source.model_dump(), "options": options.model_dump() if options else None}
+    return await _run(ctx, "load_data", arg)
 
 @app.tool("infer_schema")
-async def _infer_schema() -> Dict[str, Any]:
+async def _infer_schema(ctx: Context) -> Dict[str, Any]:
     """Infer column dtypes and basic info for the current dataset."""
-    df = STATE.require_df()
-    return {"ok": True, "schema": infer_schema(df)}
+    return await _run(ctx, "infer_schema", {})
 
 @app.tool("missing_report")
-async def _missing_report() -> Dict[str, Any]:
+async def _missing_report(ctx: Context) -> Dict[str, Any]:
     """Missing values summary per column (count/ratio)."""
-    df = STATE.require_df()
-    return {"ok": True, "missing_pct": missing_report(df)}
+    return await _run(ctx, "missing_report", {})
+
+@app.tool("missing_patterns")
+async def _missing_patterns(
+    ctx: Context,
+    top: int = 10,
+    pairs: int = 20,
+    min_abs: float = 0.0,
+    full_matrix: bool = False
+) -> Dict[str, Any]:
+    """Most frequent co-missingness patterns and top column pairs by missingness correlation (phi)."""
+    arg = {"top": top, "pairs": pairs, "min_abs": min_abs, "full_matrix": full_matrix}
+    return await _run(ctx, "missing_patterns", arg)
 
 @app.tool("profile")
 async def _profile(
+    ctx: Context,
     columns: Optional[List[str]] = None,
     percentiles: Optional[List[float]] = None
 ) -> Dict[str, Any]:
     """Descriptive stats for numeric columns; optional column subset."""
-    df = STATE.require_df()
-    return {"ok": True, **profile_tool(df, columns=columns, percentiles=percentiles)}
+    return await _run(ctx, "profile", {"columns": columns, "percentiles": percentiles})
 
 @app.tool("correlation")
-async def _correlation(method: Literal["pearson", "spearman", "kendall"] = "pearson") -> Dict[str, Any]:
+async def _correlation(ctx: Context, method: Literal["pearson", "spearman", "kendall"] = "pearson") -> Dict[str, Any]:
     """Correlation matrix with the chosen method."""
-    df = STATE.require_df()
-    return {"ok": True, "method": method, "matrix": correlation(df, method=method)}
+    return await _run(ctx, "correlation", {"method": method})
 
 @app.tool("detect_outliers")
 async def _detect_outliers(
+    ctx: Context,
     column: str,
     method: Literal["iqr", "zscore"] = "iqr",
     factor: float = 1.5,
     z: float = 3.0
 ) -> Dict[str, Any]:
     """Detect outliers on a numeric column (IQR/Z-score)."""
-    df = STATE.require_df()
-    return {"ok": True, **detect_outliers(df, column=column, method=method, factor=factor, z=z)}
+    arg = {"column": column, "method": method, "factor": factor, "z": z}
+    return await _run(ctx, "detect_outliers", arg)
 
 @app.tool("groupby")
-async def _groupby(by: List[str], metrics: Dict[str, List[str]]) -> Dict[str, Any]:
+async def _groupby(ctx: Context, by: List[str], metrics: Dict[str, List[str]]) -> Dict[str, Any]:
     """
     Group by keys and apply aggregations.
     metrics ejemplo: {"price": ["mean","sum"], "qty": ["sum"]}
     """
-    df = STATE.require_df()
-    return {"ok": True, "result": groupby_tool(df, by=by, metrics=metrics)}
+    return await _run(ctx, "groupby", {"by": by, "metrics": metrics})
 
 @app.tool("export_report")
-async def _export_report(dest: Dest, fmt: Literal["md", "json", "html"], sections: List[str]) -> Dict[str, Any]:
+async def _export_report(ctx: Context, dest: Dest, fmt: Literal["md", "json", "html"], sections: List[str]) -> Dict[str, Any]:
     """Export report to local file or Drive folder."""
     # dest y fmt ya están validados por Pydantic
-    d = dest.model_dump()
-    return {"ok": True, **export_report_tool(d, fmt=fmt, sections=sections)}
+    arg = {"dest": dest.model_dump(), "fmt": fmt, "sections": sections}
+    return await _run(ctx, "export_report", arg)
+
+@app.tool("session_info")
+async def _session_info(ctx: Context) -> Dict[str, Any]:
+    """Memory accounted to this session (bytes/quota) and whether its dataset is shared."""
+    return {"ok": True, **SESSIONS.usage(_session(ctx))}
 
 # ---------------------------------------------------------------------
 # CLI fallback (opcional)
@@ -153,6 +194,7 @@ def cli_loop():
                 "  load_data {json}\n"
                 "  infer_schema\n"
                 "  missing_report\n"
+                "  missing_patterns {json}\n"
                 "  profile {json}\n"
                 "  correlation {json}\n"
                 "  detect_outliers {json}\n"
@@ -170,55 +212,11 @@ def cli_loop():
                 print(f"Invalid JSON: {e}")
                 continue
 
+        if cmd not in COMMANDS:
+            print("Unknown command. Type 'help'.")
+            continue
         try:
-            if cmd == "load_data":
-                df, meta = load_data(arg.get("source"), arg.get("options"))
-                STATE.set_df(df, meta)
-                prev = df.head(5).to_dict(orient="records")
-                print(json.dumps(
-                    {"ok": True, "columns": list(map(str, df.columns)), "rows_preview": prev, "source_meta": meta},
-                    indent=2, ensure_ascii=False
-                ))
-            elif cmd == "infer_schema":
-                df = STATE.require_df()
-                print(json.dumps({"ok": True, "schema": infer_schema(df)}, indent=2, ensure_ascii=False))
-            elif cmd == "missing_report":
-                df = STATE.require_df()
-                print(json.dumps({"ok": True, "missing_pct": missing_report(df)}, indent=2, ensure_ascii=False))
-            elif cmd == "profile":
-                df = STATE.require_df()
-                print(json.dumps(
-                    {"ok": True, **profile_tool(df, columns=arg.get("columns"), percentiles=arg.get("percentiles"))},
-                    indent=2, ensure_ascii=False
-                ))
-            elif cmd == "correlation":
-                df = STATE.require_df()
-                method = arg.get("method", "pearson")
-                print(json.dumps({"ok": True, "method": method, "matrix": correlation(df, method=method)},
-                                 indent=2, ensure_ascii=False))
-            elif cmd == "detect_outliers":
-                df = STATE.require_df()
-                print(json.dumps(
-                    {"ok": True, **detect_outliers(
-                        df,
-                        column=arg["column"],
-                        method=arg.get("method", "iqr"),
-                        factor=arg.get("factor", 1.5),
-                        z=arg.get("z", 3.0)
-                    )},
-                    indent=2, ensure_ascii=False
-                ))
-            elif cmd == "groupby":
-                df = STATE.require_df()
-                print(json.dumps({"ok": True, "result": groupby_tool(df, by=arg["by"], metrics=arg["metrics"])},
-                                 indent=2, ensure_ascii=False))
-            elif cmd == "export_report":
-                print(json.dumps(
-                    {"ok": True, **export_report_tool(arg["dest"], fmt=arg["fmt"], sections=arg["sections"])},
-                    indent=2, ensure_ascii=False
-                ))
-            else:
-                print("Unknown command. Type 'help'.")
+            print(json.dumps(run_command(cmd, arg, STATE), indent=2, ensure_ascii=False))
         except Exception as e:
             print(f"Error: {e}")
 
@@ -229,16 +227,41 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--mcp", action="store_true", help="Run MCP stdio server")
     parser.add_argument("--cli", action="store_true", help="Run CLI fallback")
+    parser.add_argument("--http", action="store_true", help="Run MCP over streamable HTTP (one session per client)")
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP bind host")
+    parser.add_argument("--port", type=int, default=8000, help="HTTP bind port")
+    parser.add_argument("--session-quota-mb", type=float, default=None, help="Max dataset memory per session (MB)")
+    parser.add_argument("--session-idle-ttl", type=float, default=1800.0, help="Evict sessions idle for N seconds (0 = never)")
+    parser.add_argument("--batch", metavar="SCRIPT", help="Run a command script (CLI syntax or JSONL) non-interactively")
+    parser.add_argument("--inputs", nargs="*", default=[], help="Input files/globs the batch script runs over")
+    parser.add_argument("--workers", type=int, default=None, help="Parallel worker processes for --batch (default: CPUs)")
+    parser.add_argument("--out", default=None, help="Write batch JSON lines to this file instead of stdout")
     args = parser.parse_args()
 
-    if args.mcp:
+    if args.batch:
+        try:
+            if args.out:
+                with open(args.out, "w", encoding="utf-8") as f:
+                    failed = run_batch(args.batch, args.inputs, workers=args.workers, out=f)
+            else:
+                failed = run_batch(args.batch, args.inputs, workers=args.workers)
+        except (OSError, ValueError) as e:
+            parser.error(str(e))
+        raise SystemExit(1 if failed else 0)
+    elif args.http:
+        quota = int(args.session_quota_mb * 1024 * 1024) if args.session_quota_mb else None
+        SESSIONS.configure(quota_bytes=quota, idle_ttl=args.session_idle_ttl or None, require_session_id=True)
+        app.settings.host = args.host
+        app.settings.port = args.port
+        app.run(transport="streamable-http")
+    elif args.mcp:
         # STDIO por defecto
         app.run()  # <-- reemplaza app.run_stdio() por esto
         # (si quieres ser explícito): app.run(transport="stdio")
     elif args.cli:
         cli_loop()
     else:
-        print("Use --mcp to run MCP server or --cli for local CLI.")
+        print("Use --mcp to run MCP server, --http for MCP over HTTP, --cli for local CLI or --batch SCRIPT.")
 
 if __name__ == "__main__":
     main()
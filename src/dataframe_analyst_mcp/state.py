@@ -1,22 +1,266 @@
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Hashable, List, Optional, Set
+import threading
+import time
 import pandas as pd
+from .tools.nullmap import NullBitmap
+
+# Los DataFrames compartidos entre sesiones deben ser inmutables: con Copy-on-Write
+# cualquier escritura sobre una vista/derivado copia en vez de mutar el original.
+# (pandas >= 3.0 ya lo trae siempre activo y la opción está deprecada.)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+DEFAULT_SESSION_ID = "default"
+
+
+def frame_nbytes(df: Optional[pd.DataFrame]) -> int:
+    if df is None:
+        return 0
+    return int(df.memory_usage(index=True, deep=True).sum())
+
 
 @dataclass
 class SessionState:
     df: Optional[pd.DataFrame] = None
     source_meta: Dict[str, Any] = field(default_factory=dict)
     cache: Dict[str, Any] = field(default_factory=dict)
+    session_id: str = DEFAULT_SESSION_ID
+    frame_key: Optional[Hashable] = None
+    nulls: Optional[NullBitmap] = None
+    nbytes: int = 0
+    last_access: float = field(default_factory=time.monotonic)
+    store: Optional["FrameStore"] = field(default=None, repr=False)
 
-    def set_df(self, df: pd.DataFrame, source_meta: Dict[str, Any]) -> None:
+    def set_df(self, df: pd.DataFrame, source_meta: Dict[str, Any], frame_key: Optional[Hashable] = None,
+               nulls: Optional[NullBitmap] = None, nbytes: Optional[int] = None) -> None:
+        # Recargar la misma versión compartida no debe soltar la referencia que ya tenemos
+        if frame_key is None or frame_key != self.frame_key:
+            self._release_frame()
         self.df = df
         self.source_meta = source_meta
+        self.frame_key = frame_key
+        # Bitmap de nulos construido una vez por carga; lo leen schema/missing
+        self.nulls = nulls if nulls is not None else NullBitmap.from_frame(df)
+        self.nbytes = nbytes if nbytes is not None else frame_nbytes(df)
         self.cache.clear()
+        self.touch()
 
     def require_df(self) -> pd.DataFrame:
+        self.touch()
         if self.df is None:
             raise RuntimeError("No dataset loaded. Call load_data first.")
         return self.df
 
-STATE = SessionState()
+    def touch(self) -> None:
+        self.last_access = time.monotonic()
+
+    def clear(self) -> None:
+        self._release_frame()
+        self.df = None
+        self.source_meta = {}
+        self.nulls = None
+        self.nbytes = 0
+        self.cache.clear()
+
+    def _release_frame(self) -> None:
+        if self.store is not None and self.frame_key is not None:
+            self.store.release(self.frame_key, self.session_id)
+        self.frame_key = None
+
+
+@dataclass
+class _SharedFrame:
+    df: pd.DataFrame
+    meta: Dict[str, Any]
+    nulls: NullBitmap
+    nbytes: int
+    owners: Set[str] = field(default_factory=set)
+
+
+@dataclass
+class _KeyLock:
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    users: int = 0
+
+
+class FrameStore:
+    """
+    Process-wide registry of immutable DataFrames keyed by source version.
+    Sessions that load the same version get the same object by reference;
+    the frame is dropped once its last owner releases it.
+    """
+
+    def __init__(self) -> None:
+        self._entries: Dict[Hashable, _SharedFrame] = {}
+        self._loading: Dict[Hashable, _KeyLock] = {}
+        self._lock = threading.Lock()
+
+    def acquire(self, key: Hashable, owner: str,
+                load: Callable[[], tuple[pd.DataFrame, dict]]) -> tuple[pd.DataFrame, dict, int]:
+        """Return (df, meta, nbytes) for `key`, loading it only if no session holds it yet."""
+        with self._lock:
+            slot = self._loading.setdefault(key, _KeyLock())
+            slot.users += 1
+        try:
+            # Un lock por versión: cargas concurrentes del mismo origen se hacen una sola vez
+            with slot.lock:
+                with self._lock:
+                    entry = self._entries.get(key)
+                    if entry is not None:
+                        entry.owners.add(owner)
+                        return entry.df, dict(entry.meta), entry.nbytes
+                df, meta = load()
+                loaded = _SharedFrame(df=df, meta=meta, nulls=NullBitmap.from_frame(df),
+                                      nbytes=frame_nbytes(df))
+                with self._lock:
+                    entry = self._entries.setdefault(key, loaded)
+                    entry.owners.add(owner)
+                return entry.df, dict(entry.meta), entry.nbytes
+        finally:
+            # El lock por clave solo se suelta cuando nadie más lo usa ni espera
+            with self._lock:
+                slot.users -= 1
+                if slot.users == 0 and self._loading.get(key) is slot:
+                    del self._loading[key]
+
+    def release(self, key: Hashable, owner: str) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry.owners.discard(owner)
+            if not entry.owners:
+                del self._entries[key]
+
+    def nbytes(self, key: Hashable) -> Optional[int]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.nbytes if entry else None
+
+    def nulls(self, key: Hashable) -> Optional[NullBitmap]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry.nulls if entry else None
+
+    def owners(self, key: Hashable) -> Set[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            return set(entry.owners) if entry else set()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "frames": len(self._entries),
+                "bytes": sum(e.nbytes for e in self._entries.values()),
+            }
+
+
+class SessionManager:
+    """
+    Per-client sessions on top of a shared FrameStore, with a per-session
+    memory quota and eviction of sessions idle for longer than `idle_ttl`.
+    The default session (stdio / CLI) is pinned and never evicted.
+    """
+
+    def __init__(self, quota_bytes: Optional[int] = None, idle_ttl: Optional[float] = None,
+                 require_session_id: bool = False) -> None:
+        self.quota_bytes = quota_bytes
+        self.idle_ttl = idle_ttl
+        self.require_session_id = require_session_id
+        self.store = FrameStore()
+        self.default = SessionState(session_id=DEFAULT_SESSION_ID, store=self.store)
+        self._sessions: Dict[str, SessionState] = {DEFAULT_SESSION_ID: self.default}
+        self._lock = threading.Lock()
+
+    def configure(self, quota_bytes: Optional[int] = None, idle_ttl: Optional[float] = None,
+                  require_session_id: bool = False) -> None:
+        self.quota_bytes = quota_bytes
+        self.idle_ttl = idle_ttl
+        self.require_session_id = require_session_id
+
+    def get(self, session_id: Optional[str] = None) -> SessionState:
+        if session_id is None and self.require_session_id:
+            raise RuntimeError("A transport session id is required (use a stateful MCP client session).")
+        session_id = session_id or DEFAULT_SESSION_ID
+        self.evict_idle()
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = SessionState(session_id=session_id, store=self.store)
+                self._sessions[session_id] = state
+        state.touch()
+        return state
+
+    def load(self, state: SessionState, key: Optional[Hashable],
+             load: Callable[[], tuple[pd.DataFrame, dict]],
+             est_bytes: Optional[int] = None) -> tuple[pd.DataFrame, dict]:
+        """
+        Load a dataset into `state`. With a version `key` the frame is shared
+        through the store; without one (e.g. remote sources) it stays private.
+        `est_bytes` (e.g. the file size) lets the quota reject a source before
+        it is read; the exact in-memory size is checked once it is loaded.
+        """
+        known = self.store.nbytes(key) if key is not None else None
+        self._check_quota(state, known if known is not None else est_bytes)
+
+        if key is None:
+            df, meta = load()
+            nbytes = frame_nbytes(df)
+            self._check_quota(state, nbytes)
+            state.set_df(df, meta, nbytes=nbytes)
+            return df, meta
+
+        df, meta, nbytes = self.store.acquire(key, state.session_id, load)
+        try:
+            self._check_quota(state, nbytes)
+        except RuntimeError:
+            if key != state.frame_key:
+                self.store.release(key, state.session_id)
+            raise
+        state.set_df(df, meta, frame_key=key, nulls=self.store.nulls(key), nbytes=nbytes)
+        return df, meta
+
+    def drop(self, session_id: str) -> None:
+        if session_id == DEFAULT_SESSION_ID:
+            self.default.clear()
+            return
+        with self._lock:
+            state = self._sessions.pop(session_id, None)
+        if state is not None:
+            state.clear()
+
+    def evict_idle(self) -> List[str]:
+        if not self.idle_ttl:
+            return []
+        cutoff = time.monotonic() - self.idle_ttl
+        with self._lock:
+            stale = [sid for sid, s in self._sessions.items()
+                     if sid != DEFAULT_SESSION_ID and s.last_access < cutoff]
+            evicted = [self._sessions.pop(sid) for sid in stale]
+        for s in evicted:
+            s.clear()
+        return stale
+
+    def usage(self, state: SessionState) -> Dict[str, Any]:
+        shared_with = self.store.owners(state.frame_key) - {state.session_id} if state.frame_key is not None else set()
+        return {
+            "session_id": state.session_id,
+            "bytes": state.nbytes,
+            "quota_bytes": self.quota_bytes,
+            "shared": bool(shared_with),
+            "shared_with": len(shared_with),
+            "sessions": len(self._sessions),
+            "store": self.store.stats(),
+        }
+
+    def _check_quota(self, state: SessionState, nbytes: Optional[int]) -> None:
+        if self.quota_bytes is not None and nbytes is not None and nbytes > self.quota_bytes:
+            raise RuntimeError(
+                f"Dataset needs {nbytes} bytes, over the session quota of {self.quota_bytes} bytes."
+            )
+
+
+SESSIONS = SessionManager()
+STATE = SESSIONS.default
@@ -1,25 +1,32 @@
 from __future__ import annotations
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 import os
+import pandas as pd
 from ..state import STATE
 from .schema import infer_schema
-from .missing import missing_report
+from .missing import missing_report, missing_patterns
+from .nullmap import NullBitmap
 from .profile import profile
 from .corr import correlation
 from .outliers import detect_outliers
 from .io_gdrive import upload_bytes_to_drive
 
-def export_report(dest: Dict[str, Any], fmt: str, sections: List[str]) -> Dict[str, Any]:
-    df = STATE.require_df()
+def export_report(dest: Dict[str, Any], fmt: str, sections: List[str], df: Optional[pd.DataFrame] = None,
+                  nulls: Optional[NullBitmap] = None) -> Dict[str, Any]:
+    if df is None:
+        df = STATE.require_df()
+        nulls = STATE.nulls
     parts = []
     if fmt not in ("md", "json", "html"):
         raise ValueError("format must be md/json/html")
 
     # Compose content
     if "schema" in sections:
-        parts.append(render_section("Schema", infer_schema(df)))
+        parts.append(render_section("Schema", infer_schema(df, nulls=nulls)))
     if "missing" in sections:
-        parts.append(render_section("Missing", missing_report(df)))
+        parts.append(render_section("Missing", missing_report(df, nulls=nulls)))
+    if "missing_patterns" in sections:
+        parts.append(render_section("Missing patterns", missing_patterns(df, nulls=nulls)))
     if "profile" in sections:
         parts.append(render_section("Profile", profile(df)))
     if "corr" in sections or "correlation" in sections:
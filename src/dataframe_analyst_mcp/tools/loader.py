@@ -1,10 +1,36 @@
 from __future__ import annotations
-from typing import Any, Dict, Optional
+from typing import Any, Dict, NamedTuple, Optional
+import json
+import os
 import pandas as pd
 from .io_local import load_local
 from .io_gsheet import read_gsheet
 from .io_gdrive import download_file_to_tmp
 
+class SourceVersion(NamedTuple):
+    type: str
+    path: str
+    mtime_ns: int
+    size: int
+    options: str
+
+def source_version(source: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> Optional[SourceVersion]:
+    """
+    Key identifying an exact version of a source, used to share loaded frames
+    across sessions. Only local files can be versioned without fetching them
+    (path + mtime + size); remote sources return None and are never shared.
+    `size` doubles as a cheap estimate for the session memory quota.
+    """
+    if source.get("type") != "local":
+        return None
+    path = os.path.abspath(source["path"])
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    opts = json.dumps(options or {}, sort_keys=True, default=str)
+    return SourceVersion("local", path, st.st_mtime_ns, st.st_size, opts)
+
 def load_data(source: Dict[str, Any], options: Optional[Dict[str, Any]] = None) -> tuple[pd.DataFrame, dict]:
     options = options or {}
     stype = source.get("type")
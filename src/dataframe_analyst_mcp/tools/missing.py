@@ -1,12 +1,57 @@
 from __future__ import annotations
+from typing import Any, Dict, Optional
+import numpy as np
 import pandas as pd
+from .nullmap import NullBitmap
 
-def missing_report(df: pd.DataFrame) -> list[dict]:
+def missing_report(df: pd.DataFrame, nulls: Optional[NullBitmap] = None) -> list[dict]:
     total = len(df)
     if total == 0:
         return [{"column": str(c), "pct": 0.0} for c in df.columns]
+    nulls = nulls or NullBitmap.from_frame(df)
     res = []
-    for c in df.columns:
-        pct = float(df[c].isna().sum()) * 100.0 / float(total)
-        res.append({"column": str(c), "pct": round(pct, 4)})
+    for c, n in zip(nulls.columns, nulls.counts):
+        pct = float(n) * 100.0 / float(total)
+        res.append({"column": c, "pct": round(pct, 4)})
     return res
+
+def missing_patterns(df: pd.DataFrame, nulls: Optional[NullBitmap] = None, top: int = 10,
+                     pairs: int = 20, min_abs: float = 0.0, full_matrix: bool = False) -> Dict[str, Any]:
+    """
+    Co-missingness summary: the `top` most frequent null patterns and the
+    `pairs` column pairs with the largest |phi| between null indicators
+    (only |phi| >= min_abs). The k x k phi matrix is returned only on request.
+    """
+    if top < 1 or pairs < 1:
+        raise ValueError("top and pairs must be >= 1")
+    nulls = nulls or NullBitmap.from_frame(df)
+    incomplete = int(nulls.row_mask().sum())
+    pos = [i for i, n in enumerate(nulls.counts) if n]
+    cols = [nulls.columns[i] for i in pos]
+    both = nulls.co_missing(pos)
+    corr = nulls.correlation(pos)
+
+    iu, ju = np.triu_indices(len(pos), k=1)
+    phi = corr[iu, ju]
+    keep = np.flatnonzero(np.isfinite(phi) & (np.abs(phi) >= min_abs))
+    keep = keep[np.argsort(-np.abs(phi[keep]), kind="stable")][:pairs]
+    top_pairs = [
+        {"a": cols[iu[k]], "b": cols[ju[k]], "phi": _num(phi[k]), "both_missing": int(both[iu[k], ju[k]])}
+        for k in keep
+    ]
+    out = {
+        "rows": nulls.n_rows,
+        "rows_with_missing": incomplete,
+        "complete_rows": nulls.n_rows - incomplete,
+        "patterns": nulls.patterns(top=top),
+        "pairs": top_pairs,
+    }
+    if full_matrix:
+        # posicional: nombres de columna duplicados no colisionan
+        out["matrix"] = {"columns": cols, "phi": [[_num(v) for v in row] for row in corr]}
+    return out
+
+def _num(v):
+    if v is None or np.isnan(v):
+        return None
+    return round(float(v), 4)
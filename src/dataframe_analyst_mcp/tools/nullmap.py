@@ -0,0 +1,130 @@
+from __future__ import annotations
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+# Filas por bloque al construir claves de patrón (múltiplo de 64 = palabras enteras)
+_PATTERN_CHUNK_ROWS = 8192
+
+# popcount por byte para numpy < 2.0 (sin np.bitwise_count)
+_POPCOUNT8 = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+
+def _popcount(words: np.ndarray, axis: int = -1) -> np.ndarray:
+    """Number of set bits along `axis` of a uint64 array."""
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(words).sum(axis=axis, dtype=np.int64)
+    as_bytes = words.view(np.uint8)
+    return _POPCOUNT8[as_bytes].sum(axis=axis, dtype=np.int64)
+
+
+class NullBitmap:
+    """
+    Packed per-column null bitmap: one bit per cell, stored as a
+    (n_columns, n_words) uint64 array so counts and co-missingness are
+    popcounts over ANDed words. Built once when a dataset is loaded.
+    """
+
+    def __init__(self, columns: List[str], n_rows: int, words: np.ndarray) -> None:
+        self.columns = columns
+        self.n_rows = n_rows
+        self.words = words
+        self.counts = _popcount(words) if words.size else np.zeros(len(columns), dtype=np.int64)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "NullBitmap":
+        n_rows, n_cols = df.shape
+        # Bits empaquetados por columna, rellenados a múltiplo de 64 filas. Se
+        # empaqueta columna a columna: el pico extra es una sola máscara, no df.isna().
+        n_words = (n_rows + 63) // 64
+        nb = (n_rows + 7) // 8
+        packed = np.zeros((n_cols, n_words * 8), dtype=np.uint8)
+        if n_rows:
+            for i in range(n_cols):
+                mask = df.iloc[:, i].isna().to_numpy(dtype=bool)
+                packed[i, :nb] = np.packbits(mask, bitorder="little")
+        words = packed.view(np.uint64)
+        return cls([str(c) for c in df.columns], n_rows, words)
+
+    @property
+    def nbytes(self) -> int:
+        return int(self.words.nbytes)
+
+    def positions(self, columns: Optional[Iterable[str]] = None) -> List[int]:
+        """Column positions for `columns` (every position of a duplicated name); all if None."""
+        if columns is None:
+            return list(range(len(self.columns)))
+        wanted = {str(c) for c in columns}
+        missing = wanted.difference(self.columns)
+        if missing:
+            raise KeyError(f"Unknown columns: {sorted(missing)}")
+        return [i for i, c in enumerate(self.columns) if c in wanted]
+
+    def row_mask(self, columns: Optional[Iterable[str]] = None, how: str = "any") -> np.ndarray:
+        """Boolean mask of rows with a null in any/all of `columns` (default: every column)."""
+        idx = self.positions(columns)
+        if not idx:
+            return np.zeros(self.n_rows, dtype=bool)
+        sel = self.words[idx]
+        if how == "any":
+            merged = np.bitwise_or.reduce(sel, axis=0)
+        elif how == "all":
+            merged = np.bitwise_and.reduce(sel, axis=0)
+        else:
+            raise ValueError("how must be 'any' or 'all'")
+        bits = np.unpackbits(merged.view(np.uint8), count=self.n_rows, bitorder="little")
+        return bits.astype(bool)
+
+    def patterns(self, top: int = 10) -> List[dict]:
+        """Most frequent sets of columns that are missing together (rows with >=1 null)."""
+        if top < 1:
+            raise ValueError("top must be >= 1")
+        idx = [i for i, n in enumerate(self.counts) if n]
+        if not idx or self.n_rows == 0:
+            return []
+        # Claves por fila (bits de las columnas con nulos) construidas por bloques de
+        # palabras, sin desempaquetar nunca el bitmap completo.
+        sel = self.words[idx]
+        step = _PATTERN_CHUNK_ROWS // 64
+        found: Dict[bytes, int] = {}
+        for w0 in range(0, sel.shape[1], step):
+            rows = min(self.n_rows - w0 * 64, _PATTERN_CHUNK_ROWS)
+            block = np.ascontiguousarray(sel[:, w0:w0 + step]).view(np.uint8)
+            bits = np.unpackbits(block, axis=1, count=rows, bitorder="little")
+            row_keys = np.packbits(bits.T, axis=1, bitorder="little")
+            row_keys = row_keys[row_keys.any(axis=1)]
+            if not len(row_keys):
+                continue
+            keys, counts = np.unique(row_keys, axis=0, return_counts=True)
+            for k, n in zip(keys, counts):
+                kb = k.tobytes()
+                found[kb] = found.get(kb, 0) + int(n)
+        ranked = sorted(found.items(), key=lambda kv: (-kv[1], kv[0]))[:top]
+        out = []
+        for kb, n in ranked:
+            flags = np.unpackbits(np.frombuffer(kb, dtype=np.uint8), count=len(idx), bitorder="little").astype(bool)
+            out.append({
+                "columns": [self.columns[i] for i, f in zip(idx, flags) if f],
+                "count": n,
+                "pct": round(float(n) * 100.0 / float(self.n_rows), 4),
+            })
+        return out
+
+    def co_missing(self, positions: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Pairwise count of rows where both columns are null (popcount of ANDed bitsets)."""
+        idx = list(range(len(self.columns))) if positions is None else list(positions)
+        sel = self.words[idx]
+        out = np.empty((len(sel), len(sel)), dtype=np.int64)
+        for i in range(len(sel)):
+            out[i] = _popcount(sel[i] & sel)
+        return out
+
+    def correlation(self, positions: Optional[Sequence[int]] = None) -> np.ndarray:
+        """Phi coefficient between null indicators; NaN where a column is never/always null."""
+        idx = list(range(len(self.columns))) if positions is None else list(positions)
+        n = float(self.n_rows)
+        both = self.co_missing(idx).astype(float)
+        c = self.counts[idx].astype(float)
+        var = c * (n - c)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return (n * both - np.outer(c, c)) / np.sqrt(np.outer(var, var))
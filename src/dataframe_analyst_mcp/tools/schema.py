@@ -1,12 +1,14 @@
 from __future__ import annotations
+from typing import Optional
 import pandas as pd
+from .nullmap import NullBitmap
 
-def infer_schema(df: pd.DataFrame) -> list[dict]:
+def infer_schema(df: pd.DataFrame, nulls: Optional[NullBitmap] = None) -> list[dict]:
+    nulls = nulls or NullBitmap.from_frame(df)
     schema = []
-    for col in df.columns:
-        s = df[col]
+    for i, col in enumerate(df.columns):
+        s = df.iloc[:, i]
         # Basic dtype mapping
         dtype = str(s.dtype)
-        nullable = s.isna().any()
-        schema.append({"name": str(col), "dtype": dtype, "nullable": bool(nullable)})
+        schema.append({"name": str(col), "dtype": dtype, "nullable": bool(nulls.counts[i])})
     return schema
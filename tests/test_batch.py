@@ -0,0 +1,123 @@
+import io
+import os
+import json
+import pytest
+from dataframe_analyst_mcp.batch import parse_script, plan_jobs, run_batch
+
+CSV = "fecha,categoria,precio\n2023-01-01,A,1.0\n2023-01-02,B,\n2023-01-03,A,3.0\n"
+
+def test_batch_runs_script_over_inputs(tmp_path):
+    for name in ("a.csv", "b.csv"):
+        (tmp_path / name).write_text(CSV, encoding="utf-8")
+    script = tmp_path / "script.jsonl"
+    script.write_text(
+        "# comentario\n"
+        "missing_report {}\n"
+        '{"cmd": "profile", "input": "%s", "args": {"columns": ["precio"]}}\n' % (tmp_path / "a.csv"),
+        encoding="utf-8",
+    )
+    out = io.StringIO()
+    failed = run_batch(str(script), [str(tmp_path / "*.csv")], workers=1, out=out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert failed == 0
+    assert [(os.path.basename(l["input"]), l["cmd"]) for l in lines] == [
+        ("a.csv", "load_data"), ("a.csv", "missing_report"), ("a.csv", "profile"),
+        ("b.csv", "load_data"), ("b.csv", "missing_report"),
+    ]
+    assert all("ms" in l for l in lines)
+    assert lines[1]["missing_pct"][2] == {"column": "precio", "pct": 33.3333}
+
+def test_plan_jobs_without_inputs(tmp_path):
+    script = tmp_path / "s.txt"
+    script.write_text('load_data {"source": {"type": "local", "path": "x.csv"}}\ninfer_schema\n', encoding="utf-8")
+    jobs = plan_jobs(parse_script(str(script)), [])
+    assert list(jobs) == [None]
+    assert [c for c, _ in jobs[None]] == ["load_data", "infer_schema"]
+
+def _write_inputs(tmp_path, names):
+    for name in names:
+        (tmp_path / name).write_text(CSV, encoding="utf-8")
+
+def test_batch_parallel_workers(tmp_path):
+    _write_inputs(tmp_path, ("a.csv", "b.csv", "c.csv"))
+    script = tmp_path / "s.txt"
+    script.write_text('missing_report {}\ndetect_outliers {"column": "nope"}\n', encoding="utf-8")
+    out = io.StringIO()
+    failed = run_batch(str(script), [str(tmp_path / "*.csv")], workers=2, out=out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert failed == 3
+    assert {(os.path.basename(l["input"]), l["cmd"], l["ok"]) for l in lines} == {
+        (n, c, ok) for n in ("a.csv", "b.csv", "c.csv")
+        for c, ok in (("load_data", True), ("missing_report", True), ("detect_outliers", False))
+    }
+    # NaN de la vista previa sale como null (JSON estricto)
+    preview = next(l for l in lines if l["cmd"] == "load_data")["rows_preview"]
+    assert preview[1]["precio"] is None
+    assert "NaN" not in out.getvalue()
+
+def test_batch_worker_crash_is_isolated(tmp_path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+    import dataframe_analyst_mcp.batch as batch
+
+    _write_inputs(tmp_path, ("a.csv", "b.csv"))
+    script = tmp_path / "s.txt"
+    script.write_text("missing_report {}\n", encoding="utf-8")
+    real = batch.run_input
+
+    def crashing(path, cmds):
+        if path.endswith("b.csv"):
+            raise RuntimeError("worker died")
+        return real(path, cmds)
+
+    monkeypatch.setattr(batch, "ProcessPoolExecutor", ThreadPoolExecutor)
+    monkeypatch.setattr(batch, "run_input", crashing)
+    out = io.StringIO()
+    failed = run_batch(str(script), [str(tmp_path / "*.csv")], workers=2, out=out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert failed == 1
+    assert [l["cmd"] for l in lines if l["input"].endswith("a.csv")] == ["load_data", "missing_report"]
+    assert [l["error"] for l in lines if l["input"].endswith("b.csv")] == ["RuntimeError: worker died"]
+
+def test_plan_jobs_skips_inputs_without_commands():
+    jobs = plan_jobs([("a.csv", "infer_schema", {})], ["a.csv", "b.csv"])
+    assert list(jobs) == ["a.csv"]
+
+def test_empty_glob_is_an_error(tmp_path):
+    script = tmp_path / "s.txt"
+    script.write_text("infer_schema\n", encoding="utf-8")
+    with pytest.raises(ValueError, match="matched no files"):
+        run_batch(str(script), [str(tmp_path / "*.csv")], workers=1, out=io.StringIO())
+
+def test_same_file_different_spelling_is_one_job(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.mkdir("data")
+    _write_inputs(tmp_path / "data", ("f1.csv", "f2.csv"))
+    script = tmp_path / "s.jsonl"
+    script.write_text(
+        'missing_report {}\n'
+        '{"cmd": "infer_schema", "input": "./data/f1.csv"}\n',
+        encoding="utf-8",
+    )
+    out = io.StringIO()
+    assert run_batch(str(script), ["data/*.csv"], workers=1, out=out) == 0
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [(l["input"], l["cmd"]) for l in lines] == [
+        (os.path.join("data", "f1.csv"), "load_data"),
+        (os.path.join("data", "f1.csv"), "missing_report"),
+        (os.path.join("data", "f1.csv"), "infer_schema"),
+        (os.path.join("data", "f2.csv"), "load_data"),
+        (os.path.join("data", "f2.csv"), "missing_report"),
+    ]
+
+def test_failed_load_skips_rest_of_input(tmp_path):
+    script = tmp_path / "s.txt"
+    script.write_text("infer_schema\nmissing_report {}\n", encoding="utf-8")
+    out = io.StringIO()
+    failed = run_batch(str(script), [str(tmp_path / "missing.csv")], workers=1, out=out)
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert failed == 1
+    assert [l["cmd"] for l in lines] == ["load_data", "skipped"]
+    assert lines[1]["skipped"] == ["infer_schema", "missing_report"]
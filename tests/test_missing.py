@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+from dataframe_analyst_mcp.tools.missing import missing_report, missing_patterns
+from dataframe_analyst_mcp.tools.nullmap import NullBitmap
+
+def test_bitmap_matches_pandas():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(130, 70)), columns=[f"c{i}" for i in range(70)])
+    df = df.mask(rng.random(df.shape) < 0.1)
+    nulls = NullBitmap.from_frame(df)
+    assert list(nulls.counts) == list(df.isna().sum())
+    assert (nulls.row_mask() == df.isna().any(axis=1).to_numpy()).all()
+    both = (df["c0"].isna() & df["c1"].isna()).sum()
+    assert nulls.co_missing([0, 1])[0, 1] == both
+    phi = df[["c0", "c1"]].isna().astype(float).corr().iloc[0, 1]
+    assert np.isclose(nulls.correlation([0, 1])[0, 1], phi)
+
+def test_missing_patterns():
+    df = pd.DataFrame({
+        "a": [1, None, None, 4, None],
+        "b": [1, None, None, 4, 5],
+        "c": [1, 2, 3, 4, 5],
+    })
+    assert missing_report(df)[0] == {"column": "a", "pct": 60.0}
+    out = missing_patterns(df, top=5)
+    assert out["rows_with_missing"] == 3
+    assert out["patterns"][0] == {"columns": ["a", "b"], "count": 2, "pct": 40.0}
+    assert out["patterns"][1]["columns"] == ["a"]
+    assert [(p["a"], p["b"], p["both_missing"]) for p in out["pairs"]] == [("a", "b", 2)]
+    assert "matrix" not in out
+    assert missing_patterns(df, full_matrix=True)["matrix"]["columns"] == ["a", "b"]
+    with pytest.raises(ValueError):
+        missing_patterns(df, top=-1)
+
+def test_patterns_span_chunks():
+    rng = np.random.default_rng(1)
+    mask = rng.random((20000, 5)) < 0.3
+    df = pd.DataFrame(np.where(mask, np.nan, 1.0), columns=list("vwxyz"))
+    got = NullBitmap.from_frame(df).patterns(top=40)
+    want = pd.Series([tuple(c for c, m in zip("vwxyz", r) if m) for r in mask]).value_counts()
+    assert {tuple(p["columns"]): p["count"] for p in got} == {k: v for k, v in want.items() if k}
+
+def test_duplicate_column_names_and_pair_filter():
+    df = pd.DataFrame([[None, 1, None], [1, None, 1], [None, None, None], [1, 1, 1]], columns=["x", "x", "y"])
+    out = missing_patterns(df, pairs=1, min_abs=0.5)
+    assert out["pairs"] == [{"a": "x", "b": "y", "phi": 1.0, "both_missing": 2}]
+    full = missing_patterns(df, full_matrix=True)["matrix"]
+    assert full["columns"] == ["x", "x", "y"]
+    assert full["phi"][0][2] == 1.0 and full["phi"][1][2] != 1.0
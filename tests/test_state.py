@@ -0,0 +1,88 @@
+import pandas as pd
+import pytest
+from dataframe_analyst_mcp.state import SessionManager
+
+def _loader(calls):
+    def load():
+        calls.append(1)
+        return pd.DataFrame({"x": [1, 2, 3]}), {"type": "local", "path": "x.csv"}
+    return load
+
+def test_sessions_share_same_version():
+    mgr = SessionManager()
+    calls = []
+    a, b = mgr.get("a"), mgr.get("b")
+    mgr.load(a, ("local", "x.csv", 1), _loader(calls))
+    mgr.load(b, ("local", "x.csv", 1), _loader(calls))
+    assert len(calls) == 1
+    assert a.df is b.df
+    assert mgr.usage(a)["shared_with"] == 1
+    assert mgr.store.stats()["frames"] == 1
+
+    mgr.drop("a")
+    mgr.drop("b")
+    assert mgr.store.stats()["frames"] == 0
+
+def test_quota_and_idle_eviction():
+    mgr = SessionManager(quota_bytes=1, idle_ttl=60)
+    s = mgr.get("a")
+    with pytest.raises(RuntimeError):
+        mgr.load(s, ("local", "x.csv", 1), _loader([]))
+    assert s.df is None
+    assert mgr.store.stats()["frames"] == 0
+
+    s.last_access -= 120
+    assert mgr.evict_idle() == ["a"]
+    assert mgr.get("b") is not mgr.default
+
+def test_quota_estimate_rejects_before_loading():
+    mgr = SessionManager(quota_bytes=100)
+    calls = []
+    with pytest.raises(RuntimeError):
+        mgr.load(mgr.get("a"), ("local", "big.csv", 1), _loader(calls), est_bytes=10_000)
+    assert calls == []
+
+def test_shared_hit_reuses_nbytes_and_drops_loading_lock():
+    mgr = SessionManager()
+    a, b = mgr.get("a"), mgr.get("b")
+    mgr.load(a, ("local", "x.csv", 1), _loader([]))
+    mgr.load(b, ("local", "x.csv", 1), _loader([]))
+    assert a.nbytes == b.nbytes == mgr.store.nbytes(("local", "x.csv", 1))
+    assert mgr.store._loading == {}
+
+def test_require_session_id():
+    mgr = SessionManager(require_session_id=True)
+    with pytest.raises(RuntimeError):
+        mgr.get(None)
+    assert mgr.get("abc").session_id == "abc"
+
+def test_concurrent_acquire_after_failed_load():
+    import threading
+    import time
+    from dataframe_analyst_mcp.state import FrameStore
+
+    store = FrameStore()
+    calls, errors = [], []
+
+    def load():
+        calls.append(1)
+        time.sleep(0.05)
+        if len(calls) == 1:
+            raise OSError("first load fails")
+        return pd.DataFrame({"x": [1]}), {}
+
+    def worker(i):
+        try:
+            store.acquire("k", f"s{i}", load)
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(calls) == 2 and len(errors) == 1
+    assert len(store.owners("k")) == 7
+    assert store.stats()["frames"] == 1
+    assert store._loading == {}